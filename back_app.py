@@ -3,16 +3,44 @@ NJ Energy Study - Flask Application
 Run: python app.py
 """
 
+from __future__ import annotations
+
 import os
+import re
 import json
-import uuid
+import mmap
+import shutil
 import hashlib
+import secrets
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify
+from typing import Any, BinaryIO, Iterator
+from flask import Flask, Response, g, request, jsonify
+from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+try:
+    import orjson  # optional; SIMD C encoder, ~5-10x stdlib json
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import redis as redis_lib  # type: ignore[import-not-found]  # optional; shared dedup set across workers
+except ImportError:
+    redis_lib = None  # type: ignore[assignment]
+
+def json_dumps(obj: Any) -> str:
+    """Compact JSON encode (no indent), via orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(',', ':'))
+
+def json_loads(data: str | bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
 app = Flask(__name__)
 
 @app.errorhandler(413)
@@ -29,7 +57,10 @@ app.config['DATA_FOLDER'] = os.path.join(os.path.dirname(__file__), 'data')
 limiter = Limiter(
     get_remote_address,
     app=app,
-    default_limits=["100 per day", "10 per minute"]
+    default_limits=["100 per day", "10 per minute"],
+    # Counters live in Redis when REDIS_URL is set so limits hold across
+    # gunicorn workers; the in-memory store is fine for single-process dev.
+    storage_uri=os.environ.get('REDIS_URL') or 'memory://'
 )
 
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -42,88 +73,410 @@ ALLOWED_MIMETYPES = {
     'image/png',
     'image/jpeg'
 }
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+# Participant ids become filesystem path segments; anything else gets replaced
+# with a fresh token. Covers token_hex, uuid4, and the old base36 client ids.
+_PARTICIPANT_ID_RE = re.compile(r'^[A-Za-z0-9-]{1,64}$')
+
+def new_participant_id() -> str:
+    return secrets.token_hex(16)
 
-DB_PATH = os.path.join(app.config['DATA_FOLDER'], 'participants.json')
+# Optional Redis-backed digest set, one set per participant. The sidecar
+# index stays authoritative; Redis just answers "seen this digest?" in O(1)
+# without touching disk, and unlike the in-process caches it is shared
+# across gunicorn workers. Enabled by setting REDIS_URL.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+redis_client = (redis_lib.Redis.from_url(REDIS_URL, decode_responses=True)
+                if redis_lib is not None and REDIS_URL else None)
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+def known_digest(participant_id: str, digest: str) -> bool:
+    if redis_client is not None:
+        try:
+            return bool(redis_client.sismember(f'hashes:{participant_id}', digest))
+        except redis_lib.RedisError:
+            pass
+    return False
+
+def remember_digest(participant_id: str, digest: str) -> None:
+    if redis_client is not None:
+        try:
+            redis_client.sadd(f'hashes:{participant_id}', digest)
+        except redis_lib.RedisError:
+            pass
+
+DB_PATH = os.path.join(app.config['DATA_FOLDER'], 'study.db')
+# Stores written by earlier versions, imported into SQLite on first run
+LEGACY_DB_PATHS = [os.path.join(app.config['DATA_FOLDER'], 'participants.json'),
+                   os.path.join(app.config['DATA_FOLDER'], 'participants.jsonl')]
+
+# id/email are indexed rather than unique: a participant may submit more
+# than once and each submission is its own row, as in the old JSON store.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS participants (
+    id TEXT,
+    email TEXT,
+    submitted_at TEXT,
+    files_count INTEGER,
+    files TEXT,
+    survey TEXT,
+    type TEXT,
+    ip TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_participants_id ON participants(id);
+CREATE INDEX IF NOT EXISTS idx_participants_email ON participants(email);
+"""
+HASH_INDEX_NAME = '.hashes.json'
+# SHA-256 over MD5: OpenSSL uses SHA-NI/NEON where available, so it's faster
+# per byte on modern hardware as well as a stronger fingerprint.
+HASH_ALGO = 'sha256'
 
-def validate_file(file):
-    """Check file extension, mimetype, and magic bytes"""
+def _ext(name: str) -> str:
+    i = name.rfind('.')
+    return name[i + 1:].lower() if i >= 0 else ''
+
+def allowed_file(filename: str) -> bool:
+    return _ext(filename) in ALLOWED_EXTENSIONS
+
+# Leading bytes of each accepted format; JPEG only guarantees two.
+_MAGIC4 = {b'%PDF', b'\x89PNG'}
+_MAGIC2_JPEG = b'\xff\xd8'
+
+def validate_file(file: FileStorage) -> tuple[bool, str]:
+    """Check extension, declared mimetype, and magic bytes in one pass."""
     if not file or not file.filename:
         return False, "No file provided"
-    
-    # Check extension
-    if not allowed_file(file.filename):
+    if _ext(file.filename) not in ALLOWED_EXTENSIONS:
         return False, f"File type not allowed: {file.filename}"
-    
-    # Check mimetype
     if file.mimetype not in ALLOWED_MIMETYPES:
         return False, f"Invalid file type: {file.mimetype}"
-    
-    # Check magic bytes (file signature)
-    header = file.read(8)
-    file.seek(0)  # Reset file pointer
-    
-    # PDF: %PDF
-    # PNG: 89 50 4E 47
-    # JPEG: FF D8 FF
-    is_pdf = header[:4] == b'%PDF'
-    is_png = header[:4] == b'\x89PNG'
-    is_jpeg = header[:2] == b'\xff\xd8'
-    
-    if not (is_pdf or is_png or is_jpeg):
+    # Check magic bytes without moving the read pointer. Werkzeug hands us
+    # a SpooledTemporaryFile, which doesn't forward its buffer's peek();
+    # once the spool has rolled to disk the underlying BufferedRandom does,
+    # so reach through to it. In-memory spools and other peek-less streams
+    # fall back to read + seek, which is cheap when nothing is on disk.
+    stream = file.stream
+    peek = getattr(stream, 'peek', None)
+    if peek is None and getattr(stream, '_rolled', False):
+        peek = getattr(getattr(stream, '_file', None), 'peek', None)
+    if peek is not None:
+        header = peek(8)[:8]
+    else:
+        header = stream.read(8)
+        stream.seek(0)
+    if header[:4] not in _MAGIC4 and header[:2] != _MAGIC2_JPEG:
         return False, f"File content doesn't match expected type: {file.filename}"
-    
     return True, "OK"
 
-def get_participant_upload_size(participant_id):
+def get_participant_upload_size(participant_id: str) -> int:
     """Calculate total size of files already uploaded by participant"""
     participant_folder = os.path.join(app.config['UPLOAD_FOLDER'], participant_id)
-    if not os.path.exists(participant_folder):
-        return 0
-    total = 0
-    for f in os.listdir(participant_folder):
-        total += os.path.getsize(os.path.join(participant_folder, f))
-    return total
-
-def is_duplicate_file(filepath, participant_folder):
-    """Check if file with same hash already exists"""
-    if not os.path.exists(participant_folder):
+    return sum(scan_folder_sizes(participant_folder).values())
+
+def _writev_all(fd: int, bufs: list[bytes]) -> None:
+    """Write every buffer to fd, one writev syscall per batch when possible.
+
+    Handles short writes by trimming the partially written buffer; falls
+    back to plain os.write where writev is unavailable.
+    """
+    while bufs:
+        if hasattr(os, 'writev'):
+            written = os.writev(fd, bufs)
+        else:
+            written = os.write(fd, bufs[0])
+        while bufs and written >= len(bufs[0]):
+            written -= len(bufs[0])
+            bufs.pop(0)
+        if bufs and written:
+            bufs[0] = bufs[0][written:]
+
+def hash_and_save(src: BinaryIO, dst_path: str, block: int = 1 << 20,
+                  batch: int = 4 << 20) -> str:
+    """Stream src to dst_path in fixed-size blocks, returning the hexdigest.
+
+    Hashing per block keeps peak memory at one batch instead of the whole
+    upload. Blocks are gathered and flushed through an unbuffered fd with
+    os.writev, so a 4 MiB batch costs one syscall rather than four, and the
+    page cache is dropped afterwards since uploads are write-once data that
+    nothing reads back soon.
+    """
+    h = hashlib.new(HASH_ALGO)
+    fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        bufs, buffered = [], 0
+        while True:
+            chunk = src.read(block)
+            if chunk:
+                h.update(chunk)
+                bufs.append(chunk)
+                buffered += len(chunk)
+            if buffered >= batch or not chunk:
+                _writev_all(fd, bufs)
+                bufs, buffered = [], 0
+            if not chunk:
+                break
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return h.hexdigest()
+
+def _sendfile_copy(src: BinaryIO, out: BinaryIO, block: int) -> bool:
+    """Copy src to out via os.sendfile; False if src has no real fd."""
+    try:
+        src_fd = src.fileno()
+    except (OSError, ValueError):
         return False
-    
-    new_hash = hashlib.md5(open(filepath, 'rb').read()).hexdigest()
-    
-    for existing_file in os.listdir(participant_folder):
-        existing_path = os.path.join(participant_folder, existing_file)
-        if os.path.isfile(existing_path):
-            existing_hash = hashlib.md5(open(existing_path, 'rb').read()).hexdigest()
-            if new_hash == existing_hash:
-                return True
-    return False
+    offset = src.tell()
+    while True:
+        sent = os.sendfile(out.fileno(), src_fd, offset, block)
+        if sent == 0:
+            return True
+        offset += sent
+
+def save_stream(src: BinaryIO, dst_path: str, block: int = 1 << 20) -> None:
+    """Copy src to dst_path in fixed-size blocks without hashing.
+
+    Uploads that Werkzeug spooled to an on-disk tempfile are copied fd to
+    fd with os.sendfile, so the bytes never pass through userspace.
+    In-memory spools (checked via _rolled, since fileno() would force them
+    onto disk) and platforms without sendfile use a plain block copy.
+    """
+    with open(dst_path, 'wb') as out:
+        if hasattr(os, 'sendfile') and getattr(src, '_rolled', True):
+            if _sendfile_copy(src, out, block):
+                return
+        shutil.copyfileobj(src, out, block)
+
+def hash_file(path: str) -> str:
+    """Hash an on-disk file with the current algorithm.
+
+    Hashing over an mmap lets hashlib read the page cache directly with no
+    intermediate bytes allocations. Empty files can't be mapped and fall
+    back to the empty digest.
+    """
+    with open(path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.new(HASH_ALGO, mm).hexdigest()
+        except ValueError:
+            return hashlib.new(HASH_ALGO).hexdigest()
+
+def scan_folder_sizes(participant_folder: str) -> dict[str, int]:
+    """One scandir pass over a folder -> {filename: size}.
+
+    DirEntry carries the file-type bit from the directory read itself, so
+    this costs a single getdents plus one stat per regular file instead of
+    a stat per listdir name.
+    """
+    sizes = {}
+    if os.path.isdir(participant_folder):
+        with os.scandir(participant_folder) as entries:
+            for entry in entries:
+                if entry.name != HASH_INDEX_NAME and entry.is_file(follow_symlinks=False):
+                    sizes[entry.name] = entry.stat().st_size
+    return sizes
+
+# Parsed sidecar indexes keyed by folder, invalidated via the file's mtime.
+# One small entry per participant; only valid within a single worker process.
+_hash_index_cache: dict[str, tuple[int, dict[str, dict]]] = {}
+
+def _snapshot_index(index: dict[str, dict]) -> dict[str, dict]:
+    return {name: dict(entry) for name, entry in index.items()}
+
+def load_hash_index(participant_folder: str) -> dict[str, dict]:
+    """Load the cached filename -> {size, algo, digest} map for a folder.
+
+    The digest is optional: a file only gets hashed once another file of the
+    same size shows up (see ensure_digest). Entries written by older versions
+    (bare MD5 strings, or objects without a size) are migrated on first
+    sight. Rebuilds the whole index from disk if the sidecar file is missing;
+    the rebuild records sizes only, leaving digests to be computed lazily.
+
+    Parsed indexes are kept in an in-process cache keyed on the sidecar's
+    mtime_ns, so repeat submissions from the same participant skip the JSON
+    parse; callers get a copy they are free to mutate.
+    """
+    idx_path = os.path.join(participant_folder, HASH_INDEX_NAME)
+    try:
+        mtime = os.stat(idx_path).st_mtime_ns
+    except FileNotFoundError:
+        _hash_index_cache.pop(participant_folder, None)
+        return {name: {'size': size}
+                for name, size in scan_folder_sizes(participant_folder).items()}
+    cached = _hash_index_cache.get(participant_folder)
+    if cached is not None and cached[0] == mtime:
+        return _snapshot_index(cached[1])
+    with open(idx_path, 'r') as f:
+        index = json_loads(f.read())
+    migrated = False
+    sizes = None
+    for name, entry in list(index.items()):
+        if isinstance(entry, str) or 'size' not in entry:
+            if sizes is None:
+                sizes = scan_folder_sizes(participant_folder)
+            if name not in sizes:
+                del index[name]
+            elif isinstance(entry, str):
+                index[name] = {'size': sizes[name]}
+            else:
+                entry['size'] = sizes[name]
+            migrated = True
+    if migrated:
+        save_hash_index(participant_folder, index)  # refreshes the cache
+    else:
+        _hash_index_cache[participant_folder] = (mtime, _snapshot_index(index))
+    return index
+
+def ensure_digest(participant_folder: str, index: dict[str, dict], name: str) -> str:
+    """Return the stored digest for name, hashing the file lazily if needed."""
+    entry = index[name]
+    if entry.get('algo') != HASH_ALGO or 'digest' not in entry:
+        entry['algo'] = HASH_ALGO
+        entry['digest'] = hash_file(os.path.join(participant_folder, name))
+    return entry['digest']
+
+def save_hash_index(participant_folder: str, index: dict[str, dict]) -> None:
+    idx_path = os.path.join(participant_folder, HASH_INDEX_NAME)
+    with open(idx_path, 'w') as f:
+        f.write(json_dumps(index))
+    _hash_index_cache[participant_folder] = (os.stat(idx_path).st_mtime_ns,
+                                             _snapshot_index(index))
+
+def get_db() -> sqlite3.Connection:
+    """Per-request SQLite connection, opened lazily and closed on teardown."""
+    db = getattr(g, '_db', None)
+    if db is None:
+        db = g._db = sqlite3.connect(DB_PATH)
+        db.execute('PRAGMA journal_mode=WAL')
+    return db
+
+@app.teardown_appcontext
+def close_db(exc: BaseException | None) -> None:
+    db = g.pop('_db', None)
+    if db is not None:
+        db.close()
+
+def _legacy_records(paths: list[str], key: str) -> Iterator[dict]:
+    """Yield records from the old JSON/JSONL stores, oldest first."""
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r') as f:
+            if path.endswith('.jsonl'):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                yield from json.load(f).get(key, [])
+
+def _insert_participant(db: sqlite3.Connection, record: dict) -> None:
+    db.execute(
+        'INSERT INTO participants (id, email, submitted_at, files_count, files, type, survey, ip) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        (record.get('id'), record.get('email'), record.get('submitted_at'),
+         record.get('files_count', 0),
+         json_dumps(record.get('files', [])),
+         record.get('type'),
+         json_dumps(record.get('survey', {})),
+         record.get('ip')))
+
+def init_db() -> None:
+    """Create the schema; on a fresh database, import the old JSON stores."""
+    with sqlite3.connect(DB_PATH) as db:
+        db.execute('PRAGMA journal_mode=WAL')
+        db.executescript(SCHEMA)
+        if db.execute('SELECT COUNT(*) FROM participants').fetchone()[0] == 0:
+            for record in _legacy_records(LEGACY_DB_PATHS, 'participants'):
+                _insert_participant(db, record)
 
-def read_db():
-    if not os.path.exists(DB_PATH):
-        return {'participants': []}
-    with open(DB_PATH, 'r') as f:
-        return json.load(f)
+init_db()
 
-def write_db(data):
-    with open(DB_PATH, 'w') as f:
-        json.dump(data, f, indent=2)
+def add_participant(record: dict) -> None:
+    db = get_db()
+    _insert_participant(db, record)
+    db.commit()
+
+def read_db() -> Iterator[dict]:
+    """Lazily yield participant records, oldest first."""
+    rows = get_db().execute(
+        'SELECT id, email, submitted_at, files_count, files, type, survey, ip '
+        'FROM participants ORDER BY rowid')
+    for row in rows:
+        yield {'id': row[0], 'email': row[1], 'submitted_at': row[2],
+               'files_count': row[3], 'files': json_loads(row[4]),
+               'type': row[5], 'survey': json_loads(row[6]), 'ip': row[7]}
+
+# index.html is static at runtime, so render it once at import instead of
+# re-parsing the template on every hit; Cache-Control lets browsers and any
+# reverse proxy serve repeat visits without touching Flask at all.
+INDEX_HTML = app.jinja_env.get_template('index.html').render()
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return Response(INDEX_HTML, mimetype='text/html',
+                    headers={'Cache-Control': 'public, max-age=3600'})
+
+@app.route('/api/check-hashes', methods=['POST'])
+def check_hashes():
+    """Report which of the client's files are already stored.
+
+    The frontend hashes files with WebCrypto before uploading and drops
+    anything listed here from the FormData, so duplicate bytes never
+    traverse the network. Expects {participantId, files: [{name, size,
+    sha256}]} and returns the names that are already on disk.
+    """
+    try:
+        data = request.get_json()
+        participant_id = data.get('participantId', '')
+        client_files = data.get('files', [])
+
+        if (not isinstance(participant_id, str)
+                or not _PARTICIPANT_ID_RE.match(participant_id)
+                or not isinstance(client_files, list)):
+            return jsonify({'success': False, 'message': 'Invalid request'}), 400
+
+        participant_folder = os.path.join(app.config['UPLOAD_FOLDER'], participant_id)
+        if not os.path.isdir(participant_folder):
+            return jsonify({'success': True, 'duplicates': []})
+
+        hash_index = load_hash_index(participant_folder)
+        duplicates = []
+        computed = False
+        for entry in client_files:
+            digest = entry.get('sha256')
+            size = entry.get('size')
+            if digest and known_digest(participant_id, digest):
+                duplicates.append(entry.get('name'))
+                continue
+            for name in (n for n, e in hash_index.items() if e['size'] == size):
+                if 'digest' not in hash_index[name]:
+                    computed = True
+                if ensure_digest(participant_folder, hash_index, name) == digest:
+                    duplicates.append(entry.get('name'))
+                    break
+
+        # Persist digests only when ensure_digest computed new ones; an
+        # unconditional write would bump the sidecar's mtime and evict the
+        # in-process cache on every check.
+        if computed:
+            save_hash_index(participant_folder, hash_index)
+
+        return jsonify({'success': True, 'duplicates': duplicates})
+
+    except Exception as e:
+        app.logger.error(f"Hash check error: {str(e)}")
+        return jsonify({'success': False, 'message': 'Check failed.'}), 500
 
 @app.route('/api/submit', methods=['POST'])
 def submit():
     try:
         email = request.form.get('email', '').strip().lower()
-        participant_id = request.form.get('participantId', str(uuid.uuid4()))
+        participant_id = request.form.get('participantId', '')
+        if not _PARTICIPANT_ID_RE.match(participant_id):
+            participant_id = new_participant_id()
         
         # Validate email
-        if not email or '@' not in email or '.' not in email:
+        if not _EMAIL_RE.match(email):
             return jsonify({'success': False, 'message': 'Valid email required'}), 400
         
         # Check number of files
@@ -153,73 +506,85 @@ def submit():
         participant_folder = os.path.join(app.config['UPLOAD_FOLDER'], participant_id)
         os.makedirs(participant_folder, exist_ok=True)
         
-        # Save files
+        # Cached sizes/hashes of everything already in the folder
+        hash_index = load_hash_index(participant_folder)
+
+        # Plan each save up front: a file only needs hashing when its size
+        # collides with a stored file or with another file in this batch.
+        # validate_file already 400'd on anything not allowed, so no
+        # per-file re-check here.
+        jobs = []
+        batch_sizes = {}
+        for file in files:
+            stream = file.stream
+            stream.seek(0, 2)
+            size = stream.tell()
+            stream.seek(0)
+            batch_sizes[size] = batch_sizes.get(size, 0) + 1
+
+            filename = secure_filename(file.filename)
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            new_filename = f"{timestamp}_{filename}"
+            jobs.append({'stream': stream, 'original': filename,
+                         'saved': new_filename, 'size': size,
+                         'path': os.path.join(participant_folder, new_filename)})
+
+        existing_sizes = {entry['size'] for entry in hash_index.values()}
+        for job in jobs:
+            job['hash'] = (job['size'] in existing_sizes
+                           or batch_sizes[job['size']] > 1)
+
+        def run_job(job):
+            if job['hash']:
+                return hash_and_save(job['stream'], job['path'])
+            save_stream(job['stream'], job['path'])
+            return None
+
+        # hashlib releases the GIL on large buffers, so hashing the files of
+        # one batch genuinely runs in parallel and writes overlap their I/O
+        # waits. Dedup and index updates stay on the request thread.
+        if len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as pool:
+                digests = list(pool.map(run_job, jobs))
+        else:
+            digests = [run_job(job) for job in jobs]
+
         saved_files = []
         skipped_duplicates = 0
-        
-        for file in files:
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-                new_filename = f"{timestamp}_{filename}"
-                filepath = os.path.join(participant_folder, new_filename)
-        
-                # Read file content for duplicate check BEFORE saving
-                file_content = file.read()
-                file_hash = hashlib.md5(file_content).hexdigest()
-        
-                # Check for duplicates against existing files
-                is_duplicate = False
-                for existing_file in os.listdir(participant_folder):
-                    existing_path = os.path.join(participant_folder, existing_file)
-                    if os.path.isfile(existing_path):
-                        existing_hash = hashlib.md5(open(existing_path, 'rb').read()).hexdigest()
-                        if file_hash == existing_hash:
-                            is_duplicate = True
-                            skipped_duplicates += 1
-                            break
-        
-                if is_duplicate:
-                    continue
-        
-                # Save the file
-                with open(filepath, 'wb') as f:
-                    f.write(file_content)
-        
-                saved_files.append({
-                    'original': filename,
-                    'saved': new_filename,
-                    'size': os.path.getsize(filepath)
-                })
 
-        """
-        for file in files:
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-                new_filename = f"{timestamp}_{filename}"
-                filepath = os.path.join(participant_folder, new_filename)
-                file.save(filepath)
-                
-                # Check for duplicates
-                if is_duplicate_file(filepath, participant_folder):
-                    os.remove(filepath)
+        for job, digest in zip(jobs, digests):
+            if digest is not None:
+                if known_digest(participant_id, digest):
+                    os.remove(job['path'])
                     skipped_duplicates += 1
                     continue
-                
-                saved_files.append({
-                    'original': filename,
-                    'saved': new_filename,
-                    'size': os.path.getsize(filepath)
-                })
-        """
+                same_size = [name for name, entry in hash_index.items()
+                             if entry['size'] == job['size']]
+                candidates = {ensure_digest(participant_folder, hash_index, name)
+                              for name in same_size}
+                if digest in candidates:
+                    os.remove(job['path'])
+                    skipped_duplicates += 1
+                    continue
+                hash_index[job['saved']] = {'size': job['size'], 'algo': HASH_ALGO,
+                                            'digest': digest}
+                remember_digest(participant_id, digest)
+            else:
+                hash_index[job['saved']] = {'size': job['size']}
+
+            saved_files.append({
+                'original': job['original'],
+                'saved': job['saved'],
+                'size': job['size']
+            })
+
+        save_hash_index(participant_folder, hash_index)
 
         if len(saved_files) == 0:
             return jsonify({'success': False, 'message': 'No valid files uploaded'}), 400
-        
+
         # Save to database
-        db = read_db()
-        db['participants'].append({
+        add_participant({
             'id': participant_id,
             'email': email,
             'submitted_at': datetime.now().isoformat(),
@@ -228,8 +593,7 @@ def submit():
             'type': 'self-upload',
             'ip': request.remote_addr
         })
-        write_db(db)
-        
+
         return jsonify({
             'success': True, 
             'filesCount': len(saved_files),
@@ -246,12 +610,11 @@ def request_help():
         data = request.get_json()
         email = data.get('email', '').strip().lower()
         
-        if not email or '@' not in email or '.' not in email:
+        if not _EMAIL_RE.match(email):
             return jsonify({'success': False, 'message': 'Valid email required'}), 400
         
-        db = read_db()
-        db['participants'].append({
-            'id': str(uuid.uuid4()),
+        add_participant({
+            'id': new_participant_id(),
             'email': email,
             'submitted_at': datetime.now().isoformat(),
             'files_count': 0,
@@ -259,8 +622,7 @@ def request_help():
             'type': 'assistance-requested',
             'ip': request.remote_addr
         })
-        write_db(db)
-        
+
         return jsonify({'success': True})
         
     except Exception as e: